@@ -1,11 +1,56 @@
 #!/usr/bin/env python3
-from utils import get_json
+from utils import get_json, get_json_records, invalidate, memoize
+
+REPO_FIELDS = ("name", "license.key", "language", "archived")
+
+
+class RepoIndex:
+    """Facet index over a repos payload (license, language, archived)"""
+
+    def __init__(self, repos):
+        self.names = []
+        self.by_license = {}
+        self.by_language = {}
+        self.by_archived = {True: [], False: []}
+        for pos, repo in enumerate(repos):
+            if isinstance(repo, dict):
+                name = repo["name"]
+                license_key = (repo.get("license") or {}).get("key")
+                language = repo.get("language")
+                archived = repo.get("archived", False)
+            else:
+                name = repo.name
+                license_key = repo.license_key
+                language = repo.language
+                archived = repo.archived
+            self.names.append(name)
+            self.by_license.setdefault(license_key, []).append(pos)
+            self.by_language.setdefault(language, []).append(pos)
+            self.by_archived[bool(archived)].append(pos)
+
+    def lookup(self, license=None, language=None, archived=None):
+        """Return repo names matching every given facet, in payload order"""
+        facets = []
+        if license is not None:
+            facets.append(self.by_license.get(license, []))
+        if language is not None:
+            facets.append(self.by_language.get(language, []))
+        if archived is not None:
+            facets.append(self.by_archived[bool(archived)])
+        if not facets:
+            return list(self.names)
+        if len(facets) == 1:
+            return [self.names[pos] for pos in facets[0]]
+        matches = set(facets[0]).intersection(*facets[1:])
+        return [self.names[pos] for pos in sorted(matches)]
+
 
 class GithubOrgClient:
     """Client to interact with Github organization API"""
 
-    def __init__(self, org_name):
+    def __init__(self, org_name, compact=False):
         self.org_name = org_name
+        self.compact = compact
 
     def org(self):
         """Return org data as JSON"""
@@ -16,10 +61,28 @@ class GithubOrgClient:
     def _public_repos_url(self):
         return self.org().get("repos_url")
 
-    def public_repos(self):
-        """Return list of repo names"""
-        repos = get_json(self._public_repos_url)
-        return [repo["name"] for repo in repos]
+    @memoize
+    def repos_payload(self):
+        """Return the repos payload, fetched once per client.
+        With compact=True the payload is streamed and only REPO_FIELDS
+        are kept, as slotted records instead of full dicts."""
+        if self.compact:
+            return get_json_records(self._public_repos_url, REPO_FIELDS)
+        return get_json(self._public_repos_url)
+
+    @memoize
+    def repo_index(self):
+        """Return the RepoIndex for the repos payload"""
+        return RepoIndex(self.repos_payload)
+
+    def refresh(self):
+        """Drop the cached repos payload and its index"""
+        invalidate(self, "repos_payload")
+        invalidate(self, "repo_index")
+
+    def public_repos(self, license=None, language=None, archived=None):
+        """Return list of repo names, optionally filtered by facet"""
+        return self.repo_index.lookup(license, language, archived)
 
     def has_license(self, repo, license_key):
         return repo.get("license", {}).get("key") == license_key
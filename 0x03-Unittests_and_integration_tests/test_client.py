@@ -2,9 +2,10 @@
 """Unit and integration tests for GithubOrgClient."""
 
 import unittest
+from collections import namedtuple
 from unittest.mock import patch, PropertyMock, Mock
 from parameterized import parameterized, parameterized_class
-from client import GithubOrgClient
+from client import GithubOrgClient, REPO_FIELDS
 from fixtures import org_payload, repos_payload, expected_repos, apache2_repos
 
 
@@ -56,6 +57,71 @@ class TestGithubOrgClient(unittest.TestCase):
         client = GithubOrgClient("test_org")
         self.assertEqual(client.has_license(repo, license_key), expected)
 
+    @parameterized.expand([
+        ({}, ["repo1", "repo2", "repo3"]),
+        ({"license": "apache-2.0"}, ["repo1", "repo3"]),
+        ({"license": "apache-2.0", "language": "Go"}, ["repo3"]),
+        ({"archived": True}, ["repo2"]),
+        ({"license": "bsd-3-clause"}, [])
+    ])
+    @patch("client.get_json")
+    def test_public_repos_filtered(self, filters, expected, mock_get_json):
+        """Test GithubOrgClient.public_repos facet filters."""
+        mock_get_json.return_value = [
+            {"name": "repo1", "license": {"key": "apache-2.0"},
+             "language": "Python"},
+            {"name": "repo2", "license": None, "archived": True},
+            {"name": "repo3", "license": {"key": "apache-2.0"},
+             "language": "Go"}
+        ]
+        client = GithubOrgClient("test_org")
+        with patch.object(
+            GithubOrgClient,
+            "_public_repos_url",
+            new_callable=PropertyMock
+        ):
+            self.assertEqual(client.public_repos(**filters), expected)
+
+    @patch("client.get_json")
+    def test_repo_index_refresh(self, mock_get_json):
+        """Test the repo index is built once and rebuilt after refresh."""
+        mock_get_json.side_effect = [
+            [{"name": "repo1", "license": {"key": "mit"}}],
+            [{"name": "repo2", "license": {"key": "mit"}}]
+        ]
+        client = GithubOrgClient("test_org")
+        with patch.object(
+            GithubOrgClient,
+            "_public_repos_url",
+            new_callable=PropertyMock
+        ):
+            index = client.repo_index
+            self.assertEqual(client.public_repos(license="mit"), ["repo1"])
+            self.assertIs(client.repo_index, index)
+            client.refresh()
+            self.assertEqual(client.public_repos(license="mit"), ["repo2"])
+            self.assertEqual(mock_get_json.call_count, 2)
+
+    @patch("client.get_json_records")
+    def test_public_repos_compact(self, mock_records):
+        """Test compact clients index streamed records."""
+        Record = namedtuple("Record", "name license_key language archived")
+        mock_records.return_value = [
+            Record("repo1", "apache-2.0", "Python", False),
+            Record("repo2", "mit", None, True)
+        ]
+        client = GithubOrgClient("test_org", compact=True)
+        with patch.object(
+            GithubOrgClient,
+            "_public_repos_url",
+            new_callable=PropertyMock
+        ) as mock_url:
+            mock_url.return_value = "http://fake.url/repos"
+            self.assertEqual(client.public_repos(license="apache-2.0"),
+                             ["repo1"])
+            mock_records.assert_called_once_with("http://fake.url/repos",
+                                                 REPO_FIELDS)
+
 
 @parameterized_class([
     {
@@ -6,7 +6,10 @@ Unit tests for utils module
 import unittest
 from unittest.mock import patch, Mock
 from parameterized import parameterized
-from utils import access_nested_map, get_json, memoize
+from utils import (
+    access_nested_map, get_json, get_json_records, invalidate,
+    iter_json_array, memoize
+)
 
 
 class TestAccessNestedMap(unittest.TestCase):
@@ -49,6 +52,54 @@ class TestGetJson(unittest.TestCase):
             self.assertEqual(result, test_payload)
 
 
+class TestIterJsonArray(unittest.TestCase):
+    """Tests for utils.iter_json_array"""
+
+    @parameterized.expand([
+        (['[{"a": 1}, {"a": 2}]'], [{"a": 1}, {"a": 2}]),
+        (['[{"a"', ': 1},', ' {"a": 2', '}]'], [{"a": 1}, {"a": 2}]),
+        (['[1', '23, 4', ']'], [123, 4]),
+        (['  [ ]  '], [])
+    ])
+    def test_iter_json_array(self, chunks, expected):
+        """Test elements are decoded across chunk boundaries"""
+        self.assertEqual(list(iter_json_array(chunks)), expected)
+
+    @parameterized.expand([
+        (['{"a": 1}'],),
+        (['[{"a": 1}, '],),
+        (['[1,,2]'],),
+        (['[,1]'],),
+        (['[1 2]'],),
+        (['[1,]'],),
+        (['[1, x', ', 2]'],)
+    ])
+    def test_iter_json_array_invalid(self, chunks):
+        """Test non-arrays, malformed and truncated arrays raise ValueError"""
+        with self.assertRaises(ValueError):
+            list(iter_json_array(chunks))
+
+
+class TestGetJsonRecords(unittest.TestCase):
+    """Tests for utils.get_json_records"""
+
+    def test_get_json_records(self):
+        """Test only the requested fields are kept as slotted records"""
+        body = (b'[{"name": "repo1", "license": {"key": "mit"}, "x": 1},'
+                b' {"name": "repo2", "license": null}]')
+        with patch("utils.requests.get") as mock_get:
+            response = mock_get.return_value.__enter__.return_value
+            response.iter_content.return_value = [body[:17], body[17:]]
+            records = get_json_records("http://example.com",
+                                       ("name", "license.key"))
+            mock_get.assert_called_once_with("http://example.com",
+                                             stream=True)
+            response.raise_for_status.assert_called_once_with()
+        self.assertEqual([(r.name, r.license_key) for r in records],
+                         [("repo1", "mit"), ("repo2", None)])
+        self.assertFalse(hasattr(records[0], "__dict__"))
+
+
 class TestMemoize(unittest.TestCase):
     """Tests for utils.memoize decorator"""
 
@@ -74,3 +125,25 @@ class TestMemoize(unittest.TestCase):
             self.assertEqual(result1, 42)
             self.assertEqual(result2, 42)
             mock_method.assert_called_once()
+
+    def test_invalidate(self):
+        """Test invalidate makes memoize recompute"""
+
+        class TestClass:
+            """Class to test invalidate"""
+
+            def a_method(self):
+                return 42
+
+            @memoize
+            def a_property(self):
+                return self.a_method()
+
+        with patch.object(
+            TestClass, "a_method", return_value=42
+        ) as mock_method:
+            obj = TestClass()
+            obj.a_property
+            invalidate(obj, "a_property")
+            obj.a_property
+            self.assertEqual(mock_method.call_count, 2)
@@ -1,20 +1,162 @@
 #!/usr/bin/env python3
+import codecs
+import json
+import re
 import requests
+from collections.abc import Mapping
 from functools import wraps
 
+_record_types = {}
+_WHITESPACE = " \t\r\n"
+_NUMBER_CHARS = frozenset("0123456789+-.eE")
+_PARTIAL_ESCAPE = re.compile(r"u[0-9a-fA-F]{0,4}")
+_JSON_LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+
+
+def access_nested_map(nested_map, path):
+    """Access a nested map with a sequence of keys, e.g.
+    access_nested_map({"a": {"b": 2}}, ("a", "b")) -> 2"""
+    for key in path:
+        if not isinstance(nested_map, Mapping):
+            raise KeyError(key)
+        nested_map = nested_map[key]
+    return nested_map
+
+
 def get_json(url):
     """Simple wrapper to get JSON from a URL"""
     response = requests.get(url)
     return response.json()
 
+
+def _incomplete(buf, error):
+    """True when a decode error only means `buf` ends mid-value,
+    i.e. more data could still make it valid"""
+    tail = buf[error.pos:]
+    if not tail.strip() or error.msg.startswith("Unterminated string"):
+        return True
+    if any(literal.startswith(tail) for literal in _JSON_LITERALS):
+        return True
+    if _PARTIAL_ESCAPE.fullmatch(tail):
+        return True  # \uXXXX escape cut short
+    return all(char in _NUMBER_CHARS for char in tail)
+
+
+def iter_json_array(chunks):
+    """Yield the elements of a top-level JSON array from text chunks,
+    decoding one element at a time instead of the whole document"""
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    # "[" -> value or "]" -> "," or "]" -> value -> ...
+    expect = "["
+    for chunk in chunks:
+        buf = buf[pos:] + chunk
+        pos = 0
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos == len(buf):
+                break
+            char = buf[pos]
+            if expect == "[":
+                if char != "[":
+                    raise ValueError("expected a JSON array")
+                expect = "first"
+                pos += 1
+                continue
+            if expect == "delimiter":
+                if char == ",":
+                    expect = "value"
+                    pos += 1
+                    continue
+                if char == "]":
+                    return
+                raise ValueError(f"expected ',' or ']' in JSON array, got {char!r}")
+            if char == "]" and expect == "first":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError as error:
+                if _incomplete(buf, error):
+                    break
+                raise ValueError(f"invalid JSON array element: {error}") from None
+            # wait for the following "," or "]" so numbers split across
+            # chunks ("12" + "34") are not cut short
+            if all(c in _NUMBER_CHARS for c in buf[end:]) and (
+                end == len(buf) or isinstance(item, (int, float))
+            ):
+                break
+            yield item
+            pos = end
+            expect = "delimiter"
+    raise ValueError("truncated JSON array")
+
+
+def record_type(fields):
+    """Return a __slots__ class holding the given dotted field paths,
+    e.g. ("name", "license.key") -> attributes name, license_key"""
+    fields = tuple(fields)
+    if fields not in _record_types:
+        slots = tuple(field.replace(".", "_") for field in fields)
+
+        def __init__(self, *values):
+            for slot, value in zip(slots, values):
+                setattr(self, slot, value)
+
+        def __repr__(self):
+            pairs = ", ".join(f"{s}={getattr(self, s)!r}" for s in slots)
+            return f"Record({pairs})"
+
+        _record_types[fields] = type("Record", (), {
+            "__slots__": slots,
+            "__init__": __init__,
+            "__repr__": __repr__,
+        })
+    return _record_types[fields]
+
+
+def _pluck(item, field):
+    """Follow a dotted path through nested dicts, None if missing"""
+    for key in field.split("."):
+        if not isinstance(item, dict):
+            return None
+        item = item.get(key)
+    return item
+
+
+def get_json_records(url, fields, chunk_size=65536):
+    """Stream a JSON array from a URL, keeping only the given fields of
+    each element as compact records"""
+    Record = record_type(fields)
+    with requests.get(url, stream=True) as response:
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        chunks = (decoder.decode(chunk)
+                  for chunk in response.iter_content(chunk_size))
+        return [Record(*(_pluck(item, field) for field in fields))
+                for item in iter_json_array(chunks)]
+
+
+def _memo_attr(name):
+    """Instance attribute where memoize caches the result of `name`"""
+    return f"_{name}"
+
+
 def memoize(func):
-    """Memoization decorator"""
-    cache = {}
+    """Memoization decorator, caching the result on each instance"""
+    attr_name = _memo_attr(func.__name__)
 
     @property
     @wraps(func)
     def wrapper(self):
-        if func not in cache:
-            cache[func] = func(self)
-        return cache[func]
+        if attr_name not in self.__dict__:
+            self.__dict__[attr_name] = func(self)
+        return self.__dict__[attr_name]
     return wrapper
+
+
+def invalidate(instance, name):
+    """Drop the value memoized for `name` on instance, so the next
+    access recomputes it"""
+    instance.__dict__.pop(_memo_attr(name), None)
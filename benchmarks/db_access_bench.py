@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+db_access_bench.py
+
+Benchmarks the database access patterns used across the projects:
+- python-generators-0x00: the real stream_users, stream_users_in_batches
+  (with and without a Profiler) and lazy_paginate generators, run on the
+  sqlite backend, against a raw fetchall
+- python-decorators-0x01: connect-per-call decorators vs a shared connection
+- python-context-async-perations-0x02: ExecuteQuery vs DatabaseConnection
+- db_backend row formats: tuple / record / dict / columnar batches
+- average age: streaming every row vs the materialized table_stats (aggregates)
+
+Every run seeds a fresh SQLite database with --rows rows (tables user_data and
+users), then runs each case in its own subprocess so peak RSS is per case.
+Reports throughput (rows/s, or ops/s for per-call cases), p50/p99 latency
+per iteration and peak RSS.
+
+Usage:
+    ./db_access_bench.py --rows 100000
+    ./db_access_bench.py --rows 100000 --save-baseline baseline.json
+    ./db_access_bench.py --rows 100000 --compare baseline.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "python-generators-0x00"))
+
+import aggregates  # noqa: E402
+import db_backend  # noqa: E402
+import profiling  # noqa: E402
+
+
+def load_module(project, filename):
+    """Import a project file whose name is not a valid module name"""
+    project_dir = os.path.join(REPO_ROOT, project)
+    # project files import their sibling helpers (connection_pool, result_set)
+    if project_dir not in sys.path:
+        sys.path.insert(0, project_dir)
+    path = os.path.join(project_dir, filename)
+    name = os.path.splitext(filename)[0].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def seed(db_path, rows):
+    """Create user_data and users with `rows` rows each"""
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE user_data (user_id TEXT PRIMARY KEY, name TEXT NOT NULL,"
+        " email TEXT NOT NULL, age INTEGER NOT NULL)"
+    )
+    conn.execute(
+        "CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT NOT NULL,"
+        " email TEXT NOT NULL, age INTEGER NOT NULL)"
+    )
+    data = [
+        (str(uuid.UUID(int=i)), f"user{i}", f"user{i}@example.com", 18 + i % 70)
+        for i in range(rows)
+    ]
+    conn.executemany("INSERT INTO user_data VALUES (?, ?, ?, ?)", data)
+    conn.executemany(
+        "INSERT INTO users VALUES (?, ?, ?, ?)",
+        ((i + 1, name, email, age) for i, (_, name, email, age) in enumerate(data))
+    )
+    conn.commit()
+    aggregates.install(conn)
+    conn.close()
+
+
+# -----------------------------------
+# Cases: each returns rows handled in one iteration
+# -----------------------------------
+def generator_stream_users(ctx):
+    """0-stream_users.stream_users: one row per next()"""
+    count = 0
+    for _ in ctx["stream_users"].stream_users():
+        count += 1
+    return count
+
+
+def generator_batches(ctx):
+    """1-batch_processing.stream_users_in_batches: fetchmany batches"""
+    count = 0
+    for batch in ctx["batch_processing"].stream_users_in_batches(ctx["batch_size"]):
+        count += len(batch)
+    return count
+
+
+def generator_batches_profiled(ctx):
+    """Same as generator_batches with a Profiler active, to price it"""
+    with profiling.Profiler():
+        return generator_batches(ctx)
+
+
+def generator_lazy_paginate(ctx):
+    """2-lazy_paginate.lazy_paginate: new connection and OFFSET per page"""
+    count = 0
+    for page in ctx["lazy_paginate"].lazy_paginate(ctx["batch_size"]):
+        count += len(page)
+    return count
+
+
+def scan_fetchall(ctx):
+    """Raw driver fetchall, the reference the generators are measured against"""
+    conn = sqlite3.connect(ctx["db"])
+    cursor = conn.cursor()
+    cursor.execute("SELECT user_id, name, email, age FROM user_data")
+    count = len(cursor.fetchall())
+    conn.close()
+    return count
+
+
+def decorator_connect_per_call(ctx):
+    """fetch_all_users from 0-log_queries opens users.db on every call"""
+    fetch_all_users = ctx["log_queries"].fetch_all_users
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(ctx["calls"]):
+            fetch_all_users(query=f"SELECT * FROM users WHERE id = {i + 1}")
+    return ctx["calls"]
+
+
+def decorator_shared_connection(ctx):
+    conn = sqlite3.connect(ctx["db"])
+    for i in range(ctx["calls"]):
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM users WHERE id = {i + 1}")
+        cursor.fetchall()
+    conn.close()
+    return ctx["calls"]
+
+
+def context_execute_query(ctx):
+    ExecuteQuery = ctx["execute"].ExecuteQuery
+    for _ in range(ctx["calls"]):
+        with ExecuteQuery("SELECT * FROM users WHERE age > ?", (80,),
+                          db_name=ctx["db"]):
+            pass
+    return ctx["calls"]
+
+
+def context_database_connection(ctx):
+    DatabaseConnection = ctx["databaseconnection"].DatabaseConnection
+    for _ in range(ctx["calls"]):
+        with DatabaseConnection(ctx["db"]) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM users WHERE age > ?", (80,))
+            cursor.fetchall()
+            cursor.close()
+    return ctx["calls"]
+
+
+def scan_row_format(row_format):
+    """fetchmany scan converting each batch with db_backend.format_rows"""
+    def case(ctx):
+        conn = sqlite3.connect(ctx["db"])
+        cursor = conn.cursor()
+        cursor.execute("SELECT user_id, name, email, age FROM user_data")
+        count = 0
+        while True:
+            rows = cursor.fetchmany(ctx["batch_size"])
+            if not rows:
+                break
+            db_backend.format_rows(cursor, rows, row_format)
+            count += len(rows)
+        conn.close()
+        return count
+    return case
+
+
+def average_streamed(ctx):
+    """compute_average_age's way: stream every age and sum in Python"""
+    conn = sqlite3.connect(ctx["db"])
+    cursor = conn.cursor()
+    cursor.execute("SELECT age FROM user_data")
+    total = count = 0
+    for (age,) in cursor:
+        total += age
+        count += 1
+    conn.close()
+    return count
+
+
+def average_materialized(ctx):
+    """Same answer from table_stats, one lookup per call"""
+    for _ in range(ctx["calls"]):
+        conn = sqlite3.connect(ctx["db"])
+        aggregates.get_stats(conn)
+        conn.close()
+    return ctx["calls"]
+
+
+CASES = {
+    "generator_stream_users": generator_stream_users,
+    "generator_batches": generator_batches,
+    "generator_batches_profiled": generator_batches_profiled,
+    "generator_lazy_paginate": generator_lazy_paginate,
+    "scan_fetchall": scan_fetchall,
+    "decorator_connect_per_call": decorator_connect_per_call,
+    "decorator_shared_connection": decorator_shared_connection,
+    "context_execute_query": context_execute_query,
+    "context_database_connection": context_database_connection,
+    "format_tuple": scan_row_format("tuple"),
+    "format_record": scan_row_format("record"),
+    "format_dict": scan_row_format("dict"),
+    "format_columnar": scan_row_format("columnar"),
+    "average_streamed": average_streamed,
+    "average_materialized": average_materialized,
+}
+
+# cases returning calls made rather than rows read: reported as ops/s
+PER_CALL_CASES = {
+    "decorator_connect_per_call",
+    "decorator_shared_connection",
+    "context_execute_query",
+    "context_database_connection",
+    "average_materialized",
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_case(name, args):
+    """Run one case in this process and return its measurements"""
+    # the decorator modules hard-code users.db relative to the cwd
+    os.chdir(os.path.dirname(args.db))
+    ctx = {
+        "db": args.db,
+        "batch_size": args.batch_size,
+        "calls": args.calls,
+        "log_queries": load_module("python-decorators-0x01",
+                                   "0-log_queries.py"),
+        "execute": load_module("python-context-async-perations-0x02",
+                               "1-execute.py"),
+        "databaseconnection": load_module("python-context-async-perations-0x02",
+                                          "0-databaseconnection.py"),
+        "stream_users": load_module("python-generators-0x00",
+                                    "0-stream_users.py"),
+        "batch_processing": load_module("python-generators-0x00",
+                                        "1-batch_processing.py"),
+        "lazy_paginate": load_module("python-generators-0x00",
+                                     "2-lazy_paginate.py"),
+    }
+    fn = CASES[name]
+    fn(ctx)  # warm-up: page cache, module state
+    latencies = []
+    done = 0
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        done += fn(ctx)
+        latencies.append(time.perf_counter() - start)
+    elapsed = sum(latencies)
+    return {
+        "unit": "ops" if name in PER_CALL_CASES else "rows",
+        "throughput": done / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        // (1024 if sys.platform == "darwin" else 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions beyond `tolerance` (fraction)"""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if current["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {current['throughput']:.0f}"
+                f" {current['unit']}/s < baseline {base['throughput']:.0f}"
+            )
+        if current["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p99 {current['p99_ms']:.2f} ms"
+                f" > baseline {base['p99_ms']:.2f}"
+            )
+        if current["peak_rss_kb"] > base["peak_rss_kb"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: peak RSS {current['peak_rss_kb']} KiB"
+                f" > baseline {base['peak_rss_kb']}"
+            )
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--calls", type=int, default=200,
+                        help="calls per iteration for per-call cases")
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="timed iterations per case")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES),
+                        default=list(CASES))
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, args)))
+        return 0
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "users.db")
+        seed(db, args.rows)
+        # the generators connect through db_backend, which reads these on import
+        env = dict(os.environ, DB_BACKEND="sqlite", SQLITE_PATH=db)
+        for name in args.cases:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__),
+                 "--run-case", name, "--db", db,
+                 "--batch-size", str(args.batch_size),
+                 "--calls", str(args.calls), "--repeat", str(args.repeat)],
+                check=True, capture_output=True, text=True, env=env
+            ).stdout
+            results[name] = json.loads(out)
+            r = results[name]
+            print(f"{name:30} {r['throughput']:>12.0f} {r['unit']}/s"
+                  f"  p50 {r['p50_ms']:>8.2f} ms  p99 {r['p99_ms']:>8.2f} ms"
+                  f"  peak RSS {r['peak_rss_kb']:>8} KiB")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({"rows": args.rows, "results": results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("rows") != args.rows:
+            print(f"Baseline was recorded with --rows {baseline.get('rows')}")
+            return 2
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
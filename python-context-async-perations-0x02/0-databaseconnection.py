@@ -1,29 +1,70 @@
 #!/usr/bin/python3
 import sqlite3
 
+from connection_pool import get_async_pool, get_pool
+
+
 class DatabaseConnection:
     """
     Custom context manager that automatically opens and closes
     a connection to the 'users.db' SQLite database.
+
+    pool=True borrows from the shared pool for db_name (or pass a
+    ConnectionPool) instead of connecting on every `with`.
     """
 
-    def __init__(self, db_name="users.db"):
+    def __init__(self, db_name="users.db", pool=None):
         self.db_name = db_name
+        self.pool = get_pool(db_name) if pool is True else pool
         self.conn = None
 
     def __enter__(self):
-        """Establish and return the SQLite connection."""
-        self.conn = sqlite3.connect(self.db_name)
+        """Establish (or borrow) and return the SQLite connection."""
+        if self.pool:
+            self.conn = self.pool.acquire()
+        else:
+            self.conn = sqlite3.connect(self.db_name)
         return self.conn
 
     def __exit__(self, exc_type, exc_value, traceback):
         """Close the connection gracefully, even if an exception occurs."""
         if self.conn:
-            self.conn.close()
+            if self.pool:
+                self.pool.release(self.conn)
+            else:
+                self.conn.close()
+            self.conn = None
         # Return False to propagate exceptions if any occur
         return False
 
 
+class AsyncDatabaseConnection:
+    """
+    `async with` counterpart of DatabaseConnection: borrows an aiosqlite
+    connection from the shared async pool (pool=None or True) or the
+    AsyncConnectionPool given, and returns it on exit.
+    """
+
+    def __init__(self, db_name="users.db", pool=None):
+        self.db_name = db_name
+        self.pool = pool
+        self.conn = None
+
+    async def __aenter__(self):
+        """Borrow and return an aiosqlite connection."""
+        if self.pool is None or self.pool is True:
+            self.pool = get_async_pool(self.db_name)
+        self.conn = await self.pool.acquire()
+        return self.conn
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """Return the connection to the pool, even if an exception occurs."""
+        if self.conn:
+            await self.pool.release(self.conn)
+            self.conn = None
+        return False
+
+
 # --- Usage Example ---
 if __name__ == "__main__":
     with DatabaseConnection() as conn:
@@ -1,39 +1,112 @@
 #!/usr/bin/python3
 import sqlite3
 
+from connection_pool import get_async_pool, get_pool
+from result_set import afetch_rows, fetch_rows
+
 
 class ExecuteQuery:
     """
     Custom context manager that handles both the connection
     and execution of a SQL query with parameters.
+
+    pool=True borrows from the shared pool for db_name (or pass a
+    ConnectionPool) instead of connecting on every `with`.
     """
 
-    def __init__(self, query, params=None, db_name="users.db"):
+    def __init__(self, query, params=None, db_name="users.db", pool=None):
         self.query = query
         self.params = params or ()
         self.db_name = db_name
+        self.pool = get_pool(db_name) if pool is True else pool
         self.conn = None
         self.cursor = None
         self.results = None
 
     def __enter__(self):
-        """Open the connection and execute the query."""
-        self.conn = sqlite3.connect(self.db_name)
-        self.cursor = self.conn.cursor()
-        self.cursor.execute(self.query, self.params)
-        self.results = self.cursor.fetchall()
+        """Open (or borrow) the connection and execute the query."""
+        if self.pool:
+            self.conn = self.pool.acquire()
+        else:
+            self.conn = sqlite3.connect(self.db_name)
+        try:
+            self.cursor = self.conn.cursor()
+            self.cursor.execute(self.query, self.params)
+            # spills to a temp file past SPILL_THRESHOLD rows
+            self.results = fetch_rows(self.cursor)
+        except BaseException:
+            # __exit__ does not run when __enter__ raises
+            self.__exit__(None, None, None)
+            raise
         return self.results
 
     def __exit__(self, exc_type, exc_value, traceback):
         """Ensure the cursor and connection are closed properly."""
         if self.cursor:
             self.cursor.close()
+            self.cursor = None
         if self.conn:
-            self.conn.close()
+            if self.pool:
+                self.pool.release(self.conn)
+            else:
+                self.conn.close()
+            self.conn = None
         # Propagate exceptions if any occur
         return False
 
 
+class AsyncExecuteQuery:
+    """
+    Async counterpart of ExecuteQuery on the shared aiosqlite pool.
+
+    - `async with AsyncExecuteQuery(...) as results` fetches all rows
+    - `async for row in AsyncExecuteQuery(...)` streams rows one by one
+
+    Several queries awaited together (e.g. asyncio.gather) each borrow their
+    own pooled connection, so they run concurrently. pool=None or True uses
+    the shared pool for db_name; an AsyncConnectionPool can be passed too.
+    """
+
+    def __init__(self, query, params=None, db_name="users.db", pool=None):
+        self.query = query
+        self.params = params or ()
+        self.db_name = db_name
+        self.pool = pool
+        self.conn = None
+        self.results = None
+
+    async def __aenter__(self):
+        """Borrow a connection and execute the query."""
+        if self.pool is None or self.pool is True:
+            self.pool = get_async_pool(self.db_name)
+        self.conn = await self.pool.acquire()
+        try:
+            async with self.conn.execute(self.query, self.params) as cursor:
+                self.results = await afetch_rows(cursor)
+        except BaseException:
+            # __aexit__ does not run when __aenter__ raises
+            await self.__aexit__(None, None, None)
+            raise
+        return self.results
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        """Return the connection to the pool."""
+        if self.conn:
+            await self.pool.release(self.conn)
+            self.conn = None
+        return False
+
+    async def __aiter__(self):
+        """Stream rows without materializing the result set."""
+        pool = self.pool
+        if pool is None or pool is True:
+            pool = get_async_pool(self.db_name)
+        async with pool.connection() as conn:
+            async with conn.execute(self.query, self.params) as cursor:
+                async for row in cursor:
+                    yield row
+
+
 # --- Usage Example ---
 if __name__ == "__main__":
     query = "SELECT * FROM users WHERE age > ?"
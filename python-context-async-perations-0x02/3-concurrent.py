@@ -1,15 +1,28 @@
 #!/usr/bin/env python3
 import asyncio
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
 import aiosqlite
 
+from connection_pool import get_pool
+from result_set import afetch_rows, fetch_rows
+
 DB_FILE = "users.db"
 
+# rows is None and error is set when the job failed;
+# waited = seconds queued before getting a connection, elapsed = run time
+QueryResult = namedtuple(
+    "QueryResult", "index sql params rows error elapsed waited"
+)
+
 async def async_fetch_users():
     """Fetch all users asynchronously."""
     async with aiosqlite.connect(DB_FILE) as db:
         # return rows as list of tuples
         cursor = await db.execute("SELECT * FROM users")
-        rows = await cursor.fetchall()
+        rows = await afetch_rows(cursor)
         await cursor.close()
         return rows
 
@@ -17,7 +30,7 @@ async def async_fetch_older_users():
     """Fetch users older than 40 asynchronously."""
     async with aiosqlite.connect(DB_FILE) as db:
         cursor = await db.execute("SELECT * FROM users WHERE age > ?", (40,))
-        rows = await cursor.fetchall()
+        rows = await afetch_rows(cursor)
         await cursor.close()
         return rows
 
@@ -36,5 +49,54 @@ async def fetch_concurrently():
     for row in older_users[:10]:
         print(row)
 
+def _run_blocking(pool, index, sql, params, queued_at):
+    """Run one job on a pooled connection (called in a worker thread)."""
+    conn = cursor = None
+    started = time.perf_counter()
+    try:
+        conn = pool.acquire()
+        started = time.perf_counter()
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        rows, error = fetch_rows(cursor), None
+    except Exception as e:
+        # connect failures too: they belong to this job's result
+        rows, error = None, e
+    finally:
+        if cursor is not None:
+            cursor.close()
+        if conn is not None:
+            pool.release(conn)
+    return QueryResult(index, sql, params, rows, error,
+                       time.perf_counter() - started, started - queued_at)
+
+
+async def run_queries(jobs, pool=None, max_concurrency=None):
+    """
+    Run (sql, params) jobs concurrently and yield a QueryResult for each
+    as it completes. Blocking drivers (sqlite3, mysql.connector) run in a
+    thread pool; at most max_concurrency jobs run at once, and never more
+    than the connection pool size (pool defaults to the shared one for
+    DB_FILE, pass a ConnectionPool(connect=...) for another backend).
+    A failing job is reported in its result instead of raising.
+    """
+    pool = pool or get_pool(DB_FILE)
+    workers = min(max_concurrency or pool.size, pool.size)
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        queued_at = time.perf_counter()
+        futures = [
+            loop.run_in_executor(executor, _run_blocking, pool, index,
+                                 sql, params or (), queued_at)
+            for index, (sql, params) in enumerate(jobs)
+        ]
+        for next_done in asyncio.as_completed(futures):
+            yield await next_done
+    finally:
+        # consumer may stop early: drop jobs that have not started
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 if __name__ == "__main__":
     asyncio.run(fetch_concurrently())
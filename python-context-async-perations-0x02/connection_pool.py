@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+connection_pool.py
+
+Connection pools shared by the context managers in this project.
+
+- ConnectionPool(db_name, size, connect=None): thread-safe pool of sqlite3
+  connections, or of any DB-API driver's via a `connect()` callable
+- AsyncConnectionPool(db_name, size): pool of aiosqlite connections
+- get_pool(db_name) / get_async_pool(db_name): shared pool per database
+  (the async one per event loop, since aiosqlite connections belong to a loop;
+  it is closed when asyncio.run() shuts the loop down, as aiosqlite worker
+  threads would otherwise keep the process alive)
+
+Connections are opened lazily, up to `size`; borrowers wait when all are in
+use. A connection returned with an open transaction is rolled back, the same
+as closing it without commit would do.
+"""
+
+import asyncio
+import contextlib
+import queue
+import sqlite3
+import threading
+import weakref
+
+DEFAULT_POOL_SIZE = 5
+
+_pools = {}
+_pools_lock = threading.Lock()
+_async_pools = weakref.WeakKeyDictionary()
+
+
+class ConnectionPool:
+    """Pool of sqlite3 (or `connect()`-made) connections usable from any thread"""
+
+    def __init__(self, db_name="users.db", size=DEFAULT_POOL_SIZE, connect=None):
+        self.db_name = db_name
+        self.size = size
+        self._connect = connect or (
+            lambda: sqlite3.connect(db_name, check_same_thread=False)
+        )
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Borrow a connection, opening one if the pool is not full"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._connect()
+                except BaseException:
+                    self._opened -= 1
+                    raise
+        return self._idle.get()
+
+    def release(self, conn):
+        """Give a connection back, discarding uncommitted work"""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextlib.contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close idle connections"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._opened -= 1
+
+
+class AsyncConnectionPool:
+    """Pool of aiosqlite connections for one event loop"""
+
+    def __init__(self, db_name="users.db", size=DEFAULT_POOL_SIZE):
+        self.db_name = db_name
+        self.size = size
+        self._idle = []
+        self._available = asyncio.Semaphore(size)
+
+    async def acquire(self):
+        """Borrow a connection, opening one if none is idle"""
+        import aiosqlite
+        await self._available.acquire()
+        if self._idle:
+            return self._idle.pop()
+        try:
+            return await aiosqlite.connect(self.db_name)
+        except BaseException:
+            self._available.release()
+            raise
+
+    async def release(self, conn):
+        """Give a connection back, discarding uncommitted work"""
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+            self._idle.append(conn)
+        finally:
+            self._available.release()
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    async def close(self):
+        """Close idle connections"""
+        while self._idle:
+            await self._idle.pop().close()
+
+
+def get_pool(db_name="users.db"):
+    """Shared ConnectionPool for db_name"""
+    with _pools_lock:
+        if db_name not in _pools:
+            _pools[db_name] = ConnectionPool(db_name)
+        return _pools[db_name]
+
+
+async def _close_on_shutdown(pool):
+    """Parked until the loop cancels leftover tasks at shutdown"""
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await pool.close()
+
+
+def get_async_pool(db_name="users.db"):
+    """Shared AsyncConnectionPool for db_name on the running event loop"""
+    pools = _async_pools.setdefault(asyncio.get_running_loop(), {})
+    if db_name not in pools:
+        pool = AsyncConnectionPool(db_name)
+        pool.closer = asyncio.ensure_future(_close_on_shutdown(pool))
+        pools[db_name] = pool
+    return pools[db_name]
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+result_set.py
+
+ResultSet, fetch_rows and afetch_rows live in python-decorators-0x01/result_set.py;
+this module loads that file so both projects share a single implementation.
+"""
+
+import importlib.util
+import os
+import sys
+
+_SHARED = "_shared_result_set"
+
+if _SHARED not in sys.modules:
+    _path = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                         "python-decorators-0x01", "result_set.py")
+    _spec = importlib.util.spec_from_file_location(_SHARED, _path)
+    sys.modules[_SHARED] = importlib.util.module_from_spec(_spec)
+    _spec.loader.exec_module(sys.modules[_SHARED])
+
+_shared = sys.modules[_SHARED]
+SPILL_THRESHOLD = _shared.SPILL_THRESHOLD
+FETCH_BATCH_SIZE = _shared.FETCH_BATCH_SIZE
+ResultSet = _shared.ResultSet
+fetch_rows = _shared.fetch_rows
+afetch_rows = _shared.afetch_rows
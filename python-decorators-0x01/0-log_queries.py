@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import sqlite3
 import functools
+from result_set import fetch_rows
 from datetime import datetime
 
 # -----------------------------------
@@ -22,7 +23,8 @@ def fetch_all_users(query):
     conn = sqlite3.connect('users.db')
     cursor = conn.cursor()
     cursor.execute(query)
-    results = cursor.fetchall()
+    # spills to a temp file past SPILL_THRESHOLD rows
+    results = fetch_rows(cursor)
     conn.close()
     return results
 
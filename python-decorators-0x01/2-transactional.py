@@ -1,6 +1,15 @@
 #!/usr/bin/env python3
 import sqlite3
 import functools
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future, InvalidStateError
+
+# wrappers made by with_db_connection/transactional; a marker attribute would
+# not do, as functools.wraps copies it onto any decorator applied on top
+_CONNECTION_WRAPPERS = weakref.WeakSet()
 
 # Decorator to handle database connection
 def with_db_connection(func):
@@ -12,6 +21,8 @@ def with_db_connection(func):
         finally:
             conn.close()
         return result
+    # GroupCommitQueue supplies the connection itself and unwraps this layer
+    _CONNECTION_WRAPPERS.add(wrapper)
     return wrapper
 
 
@@ -28,6 +39,7 @@ def transactional(func):
             conn.rollback()
             print(f"Transaction rolled back due to error: {e}")
             raise
+    _CONNECTION_WRAPPERS.add(wrapper)
     return wrapper
 
 
@@ -38,5 +50,172 @@ def update_user_email(conn, user_id, new_email):
     cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
 
 
-# Update user's email with automatic transaction handling
-update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
+# -----------------------------------
+# Group commit: batch many small transactional writes
+# -----------------------------------
+_STOP = object()
+
+
+class GroupCommitQueue:
+    """
+    Queues calls to @transactional functions and runs them on one connection,
+    many per transaction: a group is committed once it reaches max_batch calls
+    or max_delay seconds after its first call.
+
+    submit() returns a Future resolving to the call's own result or error.
+    Each call runs inside a SAVEPOINT, so a failing call is rolled back alone
+    and the rest of its group still commits. Futures resolve after COMMIT.
+
+    The queue supplies the connection and the transaction, so the function
+    is unwrapped past with_db_connection/transactional (and only those: other
+    decorators such as retry_on_failure stay in place).
+
+    Cancelled futures are skipped. If the worker dies (e.g. the database
+    cannot be opened), every queued call fails with that error and submit()
+    raises from then on.
+    """
+
+    def __init__(self, db_name="users.db", max_batch=500, max_delay=0.05):
+        self.db_name = db_name
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._closed = False
+        self._error = None
+        self._lock = threading.Lock()
+        self._batch = []
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, func, *args, **kwargs):
+        future = Future()
+        with self._lock:
+            if self._error is not None:
+                raise RuntimeError("GroupCommitQueue worker died") from self._error
+            if self._closed:
+                raise RuntimeError("GroupCommitQueue is closed")
+            self._queue.put((_unwrap(func), args, kwargs, future))
+        return future
+
+    def close(self):
+        """Flush queued writes and stop the worker"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def _run(self):
+        try:
+            self._serve()
+        except BaseException as e:
+            with self._lock:
+                self._error = e
+            print(f"GroupCommitQueue worker stopped due to error: {e}")
+            for *_, future in self._batch:
+                _fail(future, e)
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not _STOP:
+                    _fail(item[3], e)
+
+    def _serve(self):
+        # sqlite3 connections belong to the thread that opened them
+        conn = sqlite3.connect(self.db_name, isolation_level=None)
+        try:
+            stop = False
+            while not stop:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                batch = [item]
+                deadline = time.monotonic() + self.max_delay
+                while len(batch) < self.max_batch:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stop = True
+                        break
+                    batch.append(item)
+                self._batch = batch
+                self._commit(conn, batch)
+                self._batch = []
+        finally:
+            conn.close()
+
+    def _commit(self, conn, batch):
+        # a cancelled call is dropped; the rest can no longer be cancelled
+        batch = [item for item in batch if item[3].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        outcomes = []
+        try:
+            conn.execute("BEGIN")
+            for func, args, kwargs, future in batch:
+                conn.execute("SAVEPOINT call")
+                try:
+                    result = func(conn, *args, **kwargs)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO call")
+                    conn.execute("RELEASE call")
+                    outcomes.append((future, None, e))
+                else:
+                    conn.execute("RELEASE call")
+                    outcomes.append((future, result, None))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            print(f"Transaction rolled back due to error: {e}")
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+        print(f"Transaction committed successfully ({len(batch)} writes).")
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+def _unwrap(func):
+    """Strip the leading with_db_connection/transactional layers of func"""
+    while func in _CONNECTION_WRAPPERS:
+        func = func.__wrapped__
+    return func
+
+
+def _fail(future, error):
+    """Set error on a future unless it already finished or was cancelled"""
+    if not future.done():
+        try:
+            future.set_exception(error)
+        except InvalidStateError:
+            pass
+
+
+if __name__ == "__main__":
+    # Update user's email with automatic transaction handling
+    update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
+
+    # Many updates, committed in groups
+    with GroupCommitQueue() as writes:
+        futures = [
+            writes.submit(update_user_email, user_id=i, new_email=f"user{i}@example.com")
+            for i in range(1, 101)
+        ]
+    print(sum(1 for f in futures if f.exception() is None), "updates applied")
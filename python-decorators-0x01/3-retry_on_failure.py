@@ -2,6 +2,7 @@
 import time
 import sqlite3
 import functools
+from result_set import fetch_rows
 
 # -----------------------------
 # with_db_connection decorator
@@ -46,7 +47,7 @@ def retry_on_failure(retries=3, delay=2):
 def fetch_users_with_retry(conn):
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM users")
-    return cursor.fetchall()
+    return fetch_rows(cursor)
 
 
 # -----------------------------
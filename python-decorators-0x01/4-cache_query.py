@@ -2,10 +2,20 @@
 import time
 import sqlite3
 import functools
+from collections import deque
+from result_set import fetch_rows
 
 # Global cache storage
+# Values are ResultSets stored by reference: a spilled result keeps its rows
+# in its temp file, so the cache only holds the in-memory part and offsets
 query_cache = {}
 
+# Each spilled ResultSet holds an open temp file, so only the newest
+# MAX_SPILLED_CACHED of them stay cached; an evicted one closes its file
+# once no caller holds it any more
+MAX_SPILLED_CACHED = 8
+_spilled_queries = deque()
+
 # Decorator for managing DB connection
 def with_db_connection(func):
     @functools.wraps(func)
@@ -31,6 +41,10 @@ def cache_query(func):
         # Execute and cache
         result = func(*args, **kwargs)
         query_cache[query] = result
+        if getattr(result, "spilled", False):
+            _spilled_queries.append(query)
+            while len(_spilled_queries) > MAX_SPILLED_CACHED:
+                query_cache.pop(_spilled_queries.popleft(), None)
         print("Caching new result for query.")
         return result
     return wrapper
@@ -41,7 +55,7 @@ def cache_query(func):
 def fetch_users_with_cache(conn, query):
     cursor = conn.cursor()
     cursor.execute(query)
-    return cursor.fetchall()
+    return fetch_rows(cursor)
 
 
 # First call will cache the result
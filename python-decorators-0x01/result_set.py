@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+result_set.py
+
+ResultSet: a read-only sequence of rows that keeps the first `threshold` rows
+in memory and spills the rest to an anonymous temp file, read back through
+mmap. Callers index, slice, iterate and len() it like the list fetchall()
+returns; memory stays at `threshold` rows plus 8 bytes per spilled row.
+Rows that cannot be pickled (e.g. sqlite3.Row) are all kept in memory, as
+fetchall() would.
+
+- fetch_rows(cursor, threshold)         -> ResultSet (replaces fetchall())
+- await afetch_rows(cursor, threshold)  -> same for aiosqlite cursors
+"""
+
+import mmap
+import pickle
+import tempfile
+from array import array
+from collections.abc import Sequence
+
+SPILL_THRESHOLD = 100000
+FETCH_BATCH_SIZE = 1000
+
+
+class ResultSet(Sequence):
+    """Rows in memory up to `threshold`, then in a memory-mapped temp file"""
+
+    def __init__(self, rows=(), threshold=SPILL_THRESHOLD):
+        self.threshold = threshold
+        self._rows = []
+        self._file = None
+        self._offsets = array("Q")
+        self._map = None
+        self.extend(rows)
+
+    @property
+    def spilled(self):
+        return self._file is not None
+
+    def extend(self, rows):
+        for row in rows:
+            if self._file is None and len(self._rows) < self.threshold:
+                self._rows.append(row)
+                continue
+            try:
+                data = pickle.dumps(row, pickle.HIGHEST_PROTOCOL)
+            except (TypeError, AttributeError, pickle.PicklingError):
+                self._unspill()
+                self._rows.append(row)
+                continue
+            if self._file is None:
+                self._file = tempfile.TemporaryFile()
+            self._offsets.append(self._file.tell())
+            self._file.write(data)
+        if self._file is not None and self._map is not None:
+            # file grew since it was mapped
+            self._map.close()
+            self._map = None
+
+    def _unspill(self):
+        """Move spilled rows back to memory and stop spilling"""
+        self.threshold = float("inf")
+        if self._file is not None:
+            spilled = list(self[len(self._rows):])
+            self.close()
+            self._rows.extend(spilled)
+
+    def _mapped(self):
+        if self._map is None:
+            self._file.flush()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def _spilled_row(self, i):
+        start = self._offsets[i]
+        end = (self._offsets[i + 1] if i + 1 < len(self._offsets)
+               else self._file.tell())
+        return pickle.loads(self._mapped()[start:end])
+
+    def __len__(self):
+        return len(self._rows) + len(self._offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ResultSet index out of range")
+        if index < len(self._rows):
+            return self._rows[index]
+        return self._spilled_row(index - len(self._rows))
+
+    def __iter__(self):
+        yield from self._rows
+        if self._file is not None:
+            data = self._mapped()
+            ends = list(self._offsets[1:]) + [self._file.tell()]
+            for start, end in zip(self._offsets, ends):
+                yield pickle.loads(data[start:end])
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, ResultSet)):
+            return len(self) == len(other) and all(
+                a == b for a, b in zip(self, other)
+            )
+        return NotImplemented
+
+    def __repr__(self):
+        if self.spilled:
+            return f"<ResultSet {len(self)} rows, {len(self._offsets)} spilled>"
+        return repr(self._rows)
+
+    def close(self):
+        """Release the temp file (it is deleted on close)"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._offsets = array("Q")
+
+    def __del__(self):
+        self.close()
+
+
+def fetch_rows(cursor, threshold=SPILL_THRESHOLD):
+    """Drain a DB-API cursor into a ResultSet instead of fetchall()"""
+    result = ResultSet(threshold=threshold)
+    while True:
+        rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+        if not rows:
+            return result
+        result.extend(rows)
+
+
+async def afetch_rows(cursor, threshold=SPILL_THRESHOLD):
+    """Drain an aiosqlite cursor into a ResultSet instead of fetchall()"""
+    result = ResultSet(threshold=threshold)
+    while True:
+        rows = await cursor.fetchmany(FETCH_BATCH_SIZE)
+        if not rows:
+            return result
+        result.extend(rows)
@@ -1,24 +1,39 @@
 #!/usr/bin/python3
-import MySQLdb
+import time
 
-def stream_users():
+import db_backend
+import profiling
+from seed import connect_to_prodev
+
+
+def stream_users(row_format=db_backend.DEFAULT_ROW_FORMAT):
     """
     Generator that yields user rows one by one from user_data table.
+    Connection settings come from db_backend (DB_BACKEND, MYSQL_* env vars).
+
+    row_format: "tuple" (default, no per-row conversion), "record" or "dict".
     """
-    # Connect to database (adjust credentials as needed)
-    db = MySQLdb.connect(
-        host="localhost",
-        user="root",
-        passwd="your_password",
-        db="your_database"
-    )
+    db = connect_to_prodev()
+    if not db:
+        return
 
-    cursor = db.cursor(MySQLdb.cursors.DictCursor)
+    # Server-side cursor where the driver has one, rows as native tuples
+    cursor = db_backend.cursor(db, stream=True)
     cursor.execute("SELECT * FROM user_data;")
+    convert = db_backend.row_converter(cursor, row_format)
+    prof = profiling.active()
+    rows = prof.iterate("stream_users.fetch", cursor) if prof else cursor
 
     # Single loop with yield
-    for row in cursor:
-        yield row
+    for row in rows:
+        if prof:
+            if convert:
+                row = prof.timed("stream_users.build", convert, row)
+            waited = time.perf_counter()
+            yield row
+            prof.blocked("stream_users", time.perf_counter() - waited)
+        else:
+            yield convert(row) if convert else row
 
     cursor.close()
     db.close()
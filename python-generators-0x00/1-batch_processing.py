@@ -3,8 +3,8 @@
 1-batch_processing.py
 
 Provides:
-- stream_users_in_batches(batch_size): generator yielding batches of user dicts
-- batch_processing(batch_size): prints users with age > 25 from each batch
+- stream_users_in_batches(batch_size, row_format, checkpoint): generator yielding batches of users
+- batch_processing(batch_size, checkpoint_path): prints users with age > 25 from each batch
 
 Constraints satisfied:
 - stream_users_in_batches has exactly one loop (uses cursor.fetchmany)
@@ -12,48 +12,64 @@ Constraints satisfied:
 - Total loops across file <= 3
 """
 
-from seed import connect_to_prodev
+import time
+from contextlib import nullcontext
 
+import db_backend
+import profiling
+from checkpoint import Checkpoint, resume_query
+from seed import connect_to_prodev, USER_COLUMNS
 
-def stream_users_in_batches(batch_size):
+
+def stream_users_in_batches(batch_size, row_format=db_backend.DEFAULT_ROW_FORMAT,
+                            checkpoint=None):
     """
-    Generator yielding lists (batches) of user dicts from the user_data table.
+    Generator yielding batches of users from the user_data table.
 
     Args:
         batch_size (int): number of rows per batch to yield
+        row_format (str): "tuple" (default), "record", "dict" or "columnar"
+        checkpoint (Checkpoint): if given, scan in user_id order starting
+            after checkpoint.last_key and advance it after each batch
 
     Yields:
-        list of dicts: each dict has keys 'user_id', 'name', 'email', 'age'
+        list of rows (user_id, name, email, age), or for "columnar" a dict
+        of column name -> list of values
     """
     conn = connect_to_prodev()
     if not conn:
         return
 
-    cursor = conn.cursor()
+    cursor = db_backend.cursor(conn, stream=True)
     # Use a server-side iteration pattern: fetchmany in a loop (single loop)
-    cursor.execute("SELECT user_id, name, email, age FROM user_data;")
+    # age is cast in SQL so every row format gets ints without a Python pass
+    sql, params = resume_query(
+        "SELECT user_id, name, email, CAST(age AS UNSIGNED) AS age FROM user_data",
+        checkpoint, placeholder=db_backend.backend_for(conn).placeholder
+    )
+    cursor.execute(sql, params)
+    prof = profiling.active()
     while True:
-        rows = cursor.fetchmany(batch_size)
-        if not rows:
-            break
-        batch = []
-        for row in rows:
-            # row expected as tuple: (user_id, name, email, age)
-            try:
-                user_id, name, email, age = row
-            except Exception:
-                # fallback: store row as-is
-                user = {"row": row}
-            else:
-                user = {
-                    "user_id": user_id,
-                    "name": name,
-                    "email": email,
-                    "age": int(age)
-                }
-            batch.append(user)
-        yield batch
+        if prof:
+            rows = prof.timed("stream_users_in_batches.fetch", cursor.fetchmany, batch_size)
+            if not rows:
+                break
+            batch = prof.timed("stream_users_in_batches.build", db_backend.format_rows,
+                               cursor, rows, row_format)
+            waited = time.perf_counter()
+            yield batch
+            prof.blocked("stream_users_in_batches", time.perf_counter() - waited)
+        else:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield db_backend.format_rows(cursor, rows, row_format)
+        # the consumer asked for the next batch, so this one is done
+        if checkpoint:
+            checkpoint.advance(rows[-1][0], len(rows))
 
+    if checkpoint:
+        checkpoint.clear()
     cursor.close()
     try:
         conn.close()
@@ -61,17 +77,26 @@ def stream_users_in_batches(batch_size):
         pass
 
 
-def batch_processing(batch_size):
+def batch_processing(batch_size, checkpoint_path=None):
     """
     Consumes batches from stream_users_in_batches and prints users older than 25.
+    Filters on plain tuples and only builds dicts for the users it prints.
+    With checkpoint_path, a rerun after a crash resumes after the last batch
+    that was fully printed.
 
     Loops:
       1) iterate batches (for batch in ...)
       2) iterate filtered users and print (for user in ...)
     + generator has its own loop => total loops = 3 (complies)
     """
-    for batch in stream_users_in_batches(batch_size):
+    checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+    prof = profiling.active()
+    for batch in stream_users_in_batches(batch_size, checkpoint=checkpoint):
         # filter using a generator expression in the for loop (no extra named loop)
-        for user in (u for u in batch if u.get("age", 0) > 25):
-            print(user)
-            print()
+        older = (r for r in batch if r[3] > 25)
+        if prof:
+            older = prof.timed("batch_processing.filter", list, older)
+        with prof.span("batch_processing.output", len(older)) if prof else nullcontext():
+            for row in older:
+                print(dict(zip(USER_COLUMNS, row)))
+                print()
@@ -1,22 +1,37 @@
 #!/usr/bin/python3
+import time
+
+import db_backend
+import profiling
 from seed import connect_to_prodev
 
 
-def paginate_users(page_size, offset):
+def paginate_users(page_size, offset, row_format=db_backend.DEFAULT_ROW_FORMAT):
     conn = connect_to_prodev()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
-    rows = cursor.fetchall()
+    cursor = db_backend.cursor(conn)
+    mark = db_backend.backend_for(conn).placeholder
+    cursor.execute(f"SELECT * FROM user_data LIMIT {mark} OFFSET {mark}",
+                   (page_size, offset))
+    rows = db_backend.format_rows(cursor, cursor.fetchall(), row_format)
     cursor.close()
     conn.close()
     return rows
 
 
-def lazy_paginate(page_size):
+def lazy_paginate(page_size, row_format=db_backend.DEFAULT_ROW_FORMAT):
     offset = 0
+    prof = profiling.active()
     while True:
-        page = paginate_users(page_size, offset)
+        if prof:
+            page = prof.timed("lazy_paginate.fetch", paginate_users,
+                              page_size, offset, row_format)
+        else:
+            page = paginate_users(page_size, offset, row_format)
         if not page:
             break
+        if prof:
+            waited = time.perf_counter()
         yield page
+        if prof:
+            prof.blocked("lazy_paginate", time.perf_counter() - waited)
         offset += page_size
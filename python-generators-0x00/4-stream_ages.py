@@ -2,8 +2,9 @@
 """
 4-stream_ages.py
 
-- stream_user_ages(): generator that yields ages one by one (memory-efficient)
-- compute_average_age(): consumes the generator and prints the average age
+- stream_user_ages(checkpoint): generator that yields ages one by one (memory-efficient)
+- compute_average_age(checkpoint_path): consumes the generator and prints the average age
+  (materialized=True reads the stored statistics from aggregates.py instead)
 
 Constraints satisfied:
 - stream_user_ages uses exactly one loop (while with fetchone)
@@ -12,32 +13,54 @@ Constraints satisfied:
 - does not use SQL AVG
 """
 
+import time
+
+import aggregates
+import db_backend
+import profiling
+from checkpoint import Checkpoint, resume_query
 from seed import connect_to_prodev
 
 
-def stream_user_ages():
+def stream_user_ages(checkpoint=None):
     """
     Generator that yields the 'age' field from every row in user_data one by one.
     Uses a single loop with cursor.fetchone() so batches aren't loaded in memory.
+    With a checkpoint, scans in user_id order after checkpoint.last_key.
     """
     conn = connect_to_prodev()
     if not conn:
         return
 
-    cursor = conn.cursor()
-    cursor.execute("SELECT age FROM user_data;")
+    cursor = db_backend.cursor(conn, stream=True)
+    sql, params = resume_query(
+        "SELECT age, user_id FROM user_data", checkpoint,
+        placeholder=db_backend.backend_for(conn).placeholder
+    )
+    cursor.execute(sql, params)
+    prof = profiling.active()
 
     while True:
-        row = cursor.fetchone()
+        row = prof.timed("stream_user_ages.fetch", cursor.fetchone) if prof else cursor.fetchone()
         if row is None:
             break
-        # row can be a tuple like (age,)
+        # row is a tuple like (age, user_id)
         try:
-            yield int(row[0])
+            age = int(row[0])
         except Exception:
             # skip rows that don't parse
             continue
+        if prof:
+            waited = time.perf_counter()
+        yield age
+        if prof:
+            prof.blocked("stream_user_ages", time.perf_counter() - waited)
+        # the consumer asked for the next age, so this one is counted
+        if checkpoint:
+            checkpoint.advance(row[1])
 
+    if checkpoint:
+        checkpoint.clear()
     cursor.close()
     try:
         conn.close()
@@ -45,14 +68,37 @@ def stream_user_ages():
         pass
 
 
-def compute_average_age():
+def compute_average_age(checkpoint_path=None, materialized=False):
     """
     Consumes stream_user_ages() and computes average age without loading all rows.
     Prints: Average age of users: <average>
+    With checkpoint_path, the running total/count is saved with the last
+    user_id, and a rerun continues from there instead of rescanning.
+    materialized=True answers from table_stats without streaming any row,
+    falling back to streaming when aggregates.install() never ran.
     """
+    if materialized:
+        conn = connect_to_prodev()
+        if not conn:
+            return
+        try:
+            avg = float(aggregates.average(conn))
+        except aggregates.StatsNotInstalled:
+            avg = None  # stats are opt-in: stream instead
+        finally:
+            conn.close()
+        if avg is not None:
+            print(f"Average age of users: {avg}")
+            return
+
+    checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
     total = 0
     count = 0
-    for age in stream_user_ages():
+    if checkpoint:
+        total = checkpoint.state.get("total", 0)
+        count = checkpoint.state.get("count", 0)
+        checkpoint.snapshot = lambda: {"total": total, "count": count}
+    for age in stream_user_ages(checkpoint):
         total += age
         count += 1
 
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+aggregates.py
+
+Materialized running statistics (count, sum, sum of squares) of one column
+per table, so dashboards get the average age without streaming user_data.
+
+Functions:
+- install(connection, table="user_data", column="age")
+- rebuild(connection, table="user_data", column="age")
+- get_stats(connection, table="user_data", column="age", verify=False)
+- average(connection, table="user_data", column="age")
+
+install() (opt-in, e.g. seed.create_table(conn, with_stats=True)) creates
+the table_stats table plus AFTER INSERT/UPDATE/DELETE triggers on `table`;
+MySQL needs 8.0.29+ for CREATE TRIGGER IF NOT EXISTS and the TRIGGER
+privilege. Every write then updates the stats in its own transaction,
+whatever path it takes: seed.insert_data (plain or incremental upserts),
+@transactional functions and GroupCommitQueue groups (a rolled back call or
+savepoint rolls its stats change back too).
+
+get_stats() answers from table_stats without scanning `table`. Its drift
+detector is cheap: at most every DRIFT_CHECK_INTERVAL seconds per database
+and table it looks the triggers up in the catalog. While they are missing
+the stored row is not maintained, so the answer is rescanned from the table
+until install() runs again. Writes that bypass existing triggers cannot be
+seen that way; get_stats(verify=True) compares against a full COUNT/SUM
+scan (a full scan on every call) and repairs the row with rebuild().
+get_stats() raises StatsNotInstalled if install() never ran for the column.
+The column is expected to be NOT NULL, as user_data.age is.
+"""
+
+import time
+from collections import namedtuple
+
+import db_backend
+
+STATS_TABLE = "table_stats"
+DRIFT_CHECK_INTERVAL = 60.0
+
+Stats = namedtuple("Stats", "count total mean variance")
+
+# (database_id, table, column) -> monotonic time triggers were last seen
+_last_checked = {}
+
+
+class StatsNotInstalled(LookupError):
+    """No table_stats row for a table/column: run aggregates.install()"""
+
+
+def _execute(connection, sql, params=()):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchone() if cursor.description else None
+    finally:
+        cursor.close()
+
+
+def _trigger_names(table, column):
+    return [f"{table}_{column}_stats_{suffix}" for suffix in ("ins", "upd", "del")]
+
+
+def _triggers_present(connection, table, column):
+    """Catalog lookup: are all three stats triggers still defined?"""
+    backend = db_backend.backend_for(connection)
+    names = _trigger_names(table, column)
+    marks = ", ".join([backend.placeholder] * len(names))
+    if backend.name == "sqlite":
+        sql = (f"SELECT COUNT(*) FROM sqlite_master"
+               f" WHERE type = 'trigger' AND name IN ({marks})")
+    else:
+        sql = (f"SELECT COUNT(*) FROM information_schema.TRIGGERS"
+               f" WHERE TRIGGER_SCHEMA = DATABASE() AND TRIGGER_NAME IN ({marks})")
+    return _execute(connection, sql, names)[0] == len(names)
+
+
+def _trigger_sql(backend, table, column):
+    """CREATE TRIGGER statements keeping table_stats in step with `table`"""
+    where = f"WHERE table_name = '{table}' AND column_name = '{column}'"
+    bodies = {
+        "ins": ("AFTER INSERT", f"UPDATE {STATS_TABLE} SET row_count = row_count + 1,"
+                f" total = total + NEW.{column},"
+                f" total_sq = total_sq + NEW.{column} * NEW.{column} {where}"),
+        "upd": ("AFTER UPDATE", f"UPDATE {STATS_TABLE} SET"
+                f" total = total - OLD.{column} + NEW.{column},"
+                f" total_sq = total_sq - OLD.{column} * OLD.{column}"
+                f" + NEW.{column} * NEW.{column} {where}"),
+        "del": ("AFTER DELETE", f"UPDATE {STATS_TABLE} SET row_count = row_count - 1,"
+                f" total = total - OLD.{column},"
+                f" total_sq = total_sq - OLD.{column} * OLD.{column} {where}"),
+    }
+    statements = []
+    for (event, body), name in zip(bodies.values(), _trigger_names(table, column)):
+        # IF NOT EXISTS: reinstalling never leaves a window without triggers
+        if backend.name == "sqlite":
+            statements.append(f"CREATE TRIGGER IF NOT EXISTS {name} {event} ON {table}"
+                              f" BEGIN {body}; END")
+        else:
+            statements.append(f"CREATE TRIGGER IF NOT EXISTS {name} {event} ON {table}"
+                              f" FOR EACH ROW {body}")
+    return statements
+
+
+def install(connection, table="user_data", column="age"):
+    """Create table_stats and the triggers for table.column, then fill it"""
+    backend = db_backend.backend_for(connection)
+    _execute(connection, f"""
+    CREATE TABLE IF NOT EXISTS {STATS_TABLE} (
+      table_name VARCHAR(64) NOT NULL,
+      column_name VARCHAR(64) NOT NULL,
+      row_count BIGINT NOT NULL,
+      total DECIMAL(30,0) NOT NULL,
+      total_sq DECIMAL(40,0) NOT NULL,
+      PRIMARY KEY (table_name, column_name)
+    )
+    """)
+    for sql in _trigger_sql(backend, table, column):
+        _execute(connection, sql)
+    rebuild(connection, table, column)
+
+
+def _in_transaction(connection):
+    """True when `connection` may hold uncommitted work of its caller"""
+    state = getattr(connection, "in_transaction", None)
+    if state is None:
+        # MySQLdb has no in_transaction: only autocommit is known to be idle
+        return not connection.get_autocommit()
+    return state
+
+
+def _scan(connection, table, column):
+    """(count, total, total_sq) computed from the table itself: a full scan"""
+    return _execute(connection, f"SELECT COUNT(*), COALESCE(SUM({column}), 0),"
+                                f" COALESCE(SUM({column} * {column}), 0) FROM {table}")
+
+
+def rebuild(connection, table="user_data", column="age"):
+    """
+    Recompute the stats with one INSERT ... SELECT scan of the table.
+    Commits, so call it on a connection without pending work.
+    """
+    _execute(connection, f"""
+    REPLACE INTO {STATS_TABLE} (table_name, column_name, row_count, total, total_sq)
+    SELECT '{table}', '{column}', COUNT(*), COALESCE(SUM({column}), 0),
+           COALESCE(SUM({column} * {column}), 0)
+    FROM {table}
+    """)
+    connection.commit()
+
+
+def _check_key(connection, table, column):
+    return (db_backend.database_id(connection), table, column)
+
+
+def _to_stats(count, total, total_sq):
+    count, total, total_sq = int(count), int(total), int(total_sq)
+    if not count:
+        return Stats(0, 0, 0.0, 0.0)
+    mean = total / count
+    return Stats(count, total, mean, total_sq / count - mean * mean)
+
+
+def get_stats(connection, table="user_data", column="age", verify=False):
+    """
+    Return Stats(count, total, mean, variance) from table_stats.
+    If the triggers are gone (checked in the catalog at most every
+    DRIFT_CHECK_INTERVAL seconds), the stats are rescanned from the table.
+    verify=True always scans the table and, on mismatch, rebuilds the row
+    unless a transaction is open on `connection` (rebuild() commits).
+    Raises StatsNotInstalled when install() never ran for table.column.
+    """
+    backend = db_backend.backend_for(connection)
+    mark = backend.placeholder
+    try:
+        row = _execute(connection,
+                       f"SELECT row_count, total, total_sq FROM {STATS_TABLE}"
+                       f" WHERE table_name = {mark} AND column_name = {mark}",
+                       (table, column))
+    except backend.Error:
+        row = None  # no table_stats table at all
+    if row is None:
+        raise StatsNotInstalled(
+            f"no statistics for {table}.{column}; run aggregates.install()"
+        )
+
+    key = _check_key(connection, table, column)
+    if time.monotonic() - _last_checked.get(key, 0) >= DRIFT_CHECK_INTERVAL:
+        if not _triggers_present(connection, table, column):
+            return _to_stats(*_scan(connection, table, column))
+        _last_checked[key] = time.monotonic()
+
+    if verify:
+        actual = _scan(connection, table, column)
+        if tuple(map(int, row)) != tuple(map(int, actual)):
+            # rebuild() commits: never end a transaction the caller has open
+            if not _in_transaction(connection):
+                rebuild(connection, table, column)
+            row = actual
+    return _to_stats(*row)
+
+
+def average(connection, table="user_data", column="age"):
+    """Materialized average of table.column"""
+    return get_stats(connection, table, column).mean
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+checkpoint.py
+
+Provides:
+- Checkpoint(path, every=1000): resume point for long streaming jobs
+- resume_query(select_sql, checkpoint, key, placeholder): keyset scan after it
+
+Checkpoint attributes:
+- last_key: key of the last row the consumer finished with
+- state: consumer's partial aggregate (e.g. total/count), JSON-serialisable
+- snapshot: optional callable returning the current state; called only when
+  a checkpoint is written, so consumers pay nothing per row
+
+Generators call advance(key) after the consumer asks for the next row (so the
+previous row is fully processed) and clear() when the scan completes.
+Files are written atomically (temp file + os.replace).
+"""
+
+import json
+import os
+
+
+class Checkpoint:
+    """Persisted last processed key + partial aggregator state"""
+
+    def __init__(self, path, every=1000):
+        self.path = path
+        self.every = every
+        self.last_key = None
+        self.state = {}
+        self.snapshot = None
+        self._pending = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.last_key = data.get("last_key")
+            self.state = data.get("state", {})
+
+    def advance(self, key, rows=1):
+        """Record that rows up to `key` are processed; save every `every` rows"""
+        self.last_key = key
+        self._pending += rows
+        if self._pending >= self.every:
+            self.save()
+
+    def save(self):
+        """Write the checkpoint file atomically"""
+        if self.snapshot:
+            self.state = self.snapshot()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"last_key": self.last_key, "state": self.state}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._pending = 0
+
+    def clear(self):
+        """Scan finished: drop the file so the next run starts from row one"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.last_key = None
+        self._pending = 0
+
+
+def resume_query(select_sql, checkpoint, key="user_id", placeholder="%s"):
+    """
+    Turn "SELECT ... FROM table" into a keyset scan ordered by `key` that
+    starts after checkpoint.last_key. Returns (sql, params).
+    Without a checkpoint the query is returned unchanged (no ORDER BY cost).
+    """
+    if checkpoint is None:
+        return select_sql, ()
+    if checkpoint.last_key is None:
+        return f"{select_sql} ORDER BY {key}", ()
+    return (f"{select_sql} WHERE {key} > {placeholder} ORDER BY {key}",
+            (checkpoint.last_key,))
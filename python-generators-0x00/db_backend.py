@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+db_backend.py
+
+Single place to choose and configure the database driver.
+
+Backends (selected with the DB_BACKEND env var, default "mysql"):
+- mysql    -> mysql.connector
+- mysqldb  -> MySQLdb (mysqlclient)
+- sqlite   -> sqlite3, file at SQLITE_PATH or "<database>.db"
+              (in memory when no database is named)
+
+Functions:
+- get_backend(name=None)
+- backend_for(connection)
+- database_id(connection)
+- connect(database=None, backend=None)
+- cursor(connection, dictionary=False, stream=False)
+- bulk_insert(connection, table, columns, rows, key, on_conflict="ignore")
+- row_converter(cursor, row_format) / format_rows(cursor, rows, row_format)
+
+Drivers are imported lazily so a backend only needs its own driver installed.
+"""
+
+import os
+import sqlite3
+from collections import namedtuple
+
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql")
+DB_HOST = os.getenv("MYSQL_HOST", "localhost")
+DB_USER = os.getenv("MYSQL_USER", "root")
+DB_PASS = os.getenv("MYSQL_PASSWORD", "")
+DB_PORT = int(os.getenv("MYSQL_PORT", 3306))
+SQLITE_PATH = os.getenv("SQLITE_PATH")
+
+BULK_BATCH_SIZE = 1000
+
+# tuple is what every driver returns natively, so it costs nothing per row;
+# record (namedtuple) adds attribute access, dict and columnar build new objects
+ROW_FORMATS = ("tuple", "record", "dict", "columnar")
+DEFAULT_ROW_FORMAT = "tuple"
+
+_record_types = {}
+
+
+def _dict_row(cursor, row):
+    """sqlite3 row_factory building dicts, like DictCursor"""
+    return {col[0]: value for col, value in zip(cursor.description, row)}
+
+
+class MySQLConnectorBackend:
+    """mysql.connector: unbuffered cursors stream rows from the socket"""
+
+    name = "mysql"
+    placeholder = "%s"
+    module_prefix = "mysql.connector"
+
+    @property
+    def Error(self):
+        import mysql.connector
+        return mysql.connector.Error
+
+    def connect(self, database=None, autocommit=True):
+        import mysql.connector
+        kwargs = dict(host=DB_HOST, user=DB_USER, password=DB_PASS,
+                      port=DB_PORT, autocommit=autocommit)
+        if database:
+            kwargs["database"] = database
+        return mysql.connector.connect(**kwargs)
+
+    def cursor(self, connection, dictionary=False, stream=False):
+        return connection.cursor(dictionary=dictionary, buffered=not stream)
+
+    def begin_bulk(self, connection):
+        """Multi-row INSERTs are one statement per batch already"""
+
+    def location(self, connection):
+        cur = connection.cursor()
+        cur.execute("SELECT DATABASE()")
+        (database,) = cur.fetchone()
+        cur.close()
+        return f"{DB_HOST}:{DB_PORT}/{database}"
+
+    def upsert_sql(self, table, columns, key, on_conflict):
+        cols = ", ".join(columns)
+        values = ", ".join([self.placeholder] * len(columns))
+        if on_conflict == "update":
+            update = ", ".join(f"{c} = VALUES({c})"
+                               for c in columns if c != key)
+        else:
+            update = f"{key} = {key}"
+        return (f"INSERT INTO {table} ({cols}) VALUES ({values})"
+                f" ON DUPLICATE KEY UPDATE {update}")
+
+
+class MySQLdbBackend(MySQLConnectorBackend):
+    """MySQLdb: SSCursor/SSDictCursor keep the result set on the server"""
+
+    name = "mysqldb"
+    module_prefix = "MySQLdb"
+
+    @property
+    def Error(self):
+        import MySQLdb
+        return MySQLdb.Error
+
+    def connect(self, database=None, autocommit=True):
+        import MySQLdb
+        kwargs = dict(host=DB_HOST, user=DB_USER, passwd=DB_PASS,
+                      port=DB_PORT, autocommit=autocommit)
+        if database:
+            kwargs["db"] = database
+        return MySQLdb.connect(**kwargs)
+
+    def cursor(self, connection, dictionary=False, stream=False):
+        import MySQLdb.cursors
+        if stream:
+            cls = (MySQLdb.cursors.SSDictCursor if dictionary
+                   else MySQLdb.cursors.SSCursor)
+        else:
+            cls = (MySQLdb.cursors.DictCursor if dictionary
+                   else MySQLdb.cursors.Cursor)
+        return connection.cursor(cls)
+
+
+class SQLiteBackend:
+    """sqlite3: cursors are always lazy, so stream needs no special cursor"""
+
+    name = "sqlite"
+    placeholder = "?"
+    module_prefix = "sqlite3"
+    Error = sqlite3.Error
+
+    def connect(self, database=None, autocommit=True):
+        # no database: the "server" connection (connect_db) needs no file
+        path = SQLITE_PATH or (f"{database}.db" if database else ":memory:")
+        conn = sqlite3.connect(path)
+        if autocommit:
+            conn.isolation_level = None
+        return conn
+
+    def cursor(self, connection, dictionary=False, stream=False):
+        cur = connection.cursor()
+        if dictionary:
+            cur.row_factory = _dict_row
+        return cur
+
+    def begin_bulk(self, connection):
+        """Group an autocommit connection's executemany into one transaction"""
+        if connection.isolation_level is None and not connection.in_transaction:
+            connection.execute("BEGIN")
+
+    def location(self, connection):
+        cur = connection.cursor()
+        cur.execute("PRAGMA database_list")
+        path = next(row[2] for row in cur if row[1] == "main")
+        cur.close()
+        return os.path.abspath(path) if path else ":memory:"
+
+    def upsert_sql(self, table, columns, key, on_conflict):
+        cols = ", ".join(columns)
+        values = ", ".join([self.placeholder] * len(columns))
+        if on_conflict == "update":
+            update = ", ".join(f"{c} = excluded.{c}"
+                               for c in columns if c != key)
+            return (f"INSERT INTO {table} ({cols}) VALUES ({values})"
+                    f" ON CONFLICT({key}) DO UPDATE SET {update}")
+        return f"INSERT OR IGNORE INTO {table} ({cols}) VALUES ({values})"
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (MySQLConnectorBackend(), MySQLdbBackend(), SQLiteBackend())
+}
+
+
+def get_backend(name=None):
+    """Return the backend called `name`, or the configured DB_BACKEND"""
+    name = name or DB_BACKEND
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown DB_BACKEND: {name}") from None
+
+
+def backend_for(connection):
+    """Return the backend that produced `connection`"""
+    module = type(connection).__module__
+    for backend in BACKENDS.values():
+        if module.startswith(backend.module_prefix):
+            return backend
+    return get_backend()
+
+
+def database_id(connection):
+    """
+    Identify the database `connection` points at, e.g.
+    "sqlite:/abs/path.db" or "mysql:host:3306/ALX_prodev".
+    """
+    backend = backend_for(connection)
+    return f"{backend.name}:{backend.location(connection)}"
+
+
+def connect(database=None, backend=None, autocommit=True):
+    """Open a connection with the configured credentials"""
+    return get_backend(backend).connect(database, autocommit=autocommit)
+
+
+def cursor(connection, dictionary=False, stream=False):
+    """
+    Return a cursor for `connection`.
+    stream=True asks for an unbuffered/server-side cursor where the driver
+    has one, so rows are fetched as they are consumed.
+    """
+    return backend_for(connection).cursor(connection, dictionary, stream)
+
+
+def bulk_insert(connection, table, columns, rows, key,
+                on_conflict="ignore", batch_size=BULK_BATCH_SIZE,
+                skip_errors=False, on_skip=None):
+    """
+    Insert `rows` (iterable of tuples) with the driver's batched
+    executemany, which mysql.connector and MySQLdb rewrite into multi-row
+    INSERT statements.
+
+    on_conflict="ignore" keeps existing rows, "update" overwrites them.
+    skip_errors=True retries a failing batch row by row and drops the rows
+    that still fail, passing each to on_skip(row) if given.
+    Returns (written, skipped).
+    """
+    backend = backend_for(connection)
+    sql = backend.upsert_sql(table, columns, key, on_conflict)
+    backend.begin_bulk(connection)
+    cur = connection.cursor()
+    written = 0
+    skipped = 0
+    batch = []
+
+    def flush(batch):
+        try:
+            cur.executemany(sql, batch)
+            return len(batch), 0
+        except backend.Error:
+            if not skip_errors:
+                raise
+        ok = 0
+        for row in batch:
+            try:
+                cur.execute(sql, row)
+                ok += 1
+            except backend.Error:
+                if on_skip:
+                    on_skip(row)
+        return ok, len(batch) - ok
+
+    try:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                done, failed = flush(batch)
+                written += done
+                skipped += failed
+                batch = []
+        if batch:
+            done, failed = flush(batch)
+            written += done
+            skipped += failed
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cur.close()
+    return written, skipped
+
+
+def columns_of(cursor):
+    """Column names of the last executed query"""
+    return tuple(col[0] for col in cursor.description)
+
+
+def record_type(columns):
+    """Cached namedtuple class for a column list"""
+    columns = tuple(columns)
+    if columns not in _record_types:
+        _record_types[columns] = namedtuple("Row", columns)
+    return _record_types[columns]
+
+
+def _check_row_format(row_format, columnar=True):
+    if row_format not in ROW_FORMATS or (row_format == "columnar" and not columnar):
+        raise ValueError(f"Unsupported row_format: {row_format}")
+
+
+def row_converter(cursor, row_format=DEFAULT_ROW_FORMAT):
+    """
+    Return a function converting one driver tuple to `row_format`
+    ("tuple", "record" or "dict"), or None when no conversion is needed.
+    Build it once per query, after execute().
+    """
+    _check_row_format(row_format, columnar=False)
+    if row_format == "tuple":
+        return None
+    columns = columns_of(cursor)
+    if row_format == "record":
+        return record_type(columns)._make
+    return lambda row: dict(zip(columns, row))
+
+
+def format_rows(cursor, rows, row_format=DEFAULT_ROW_FORMAT):
+    """
+    Convert a batch of driver tuples.
+    tuple/record/dict return a list; columnar returns {column: [values]}.
+    An empty batch is falsy in every format, so `if not batch` stays valid.
+    """
+    _check_row_format(row_format)
+    if row_format == "tuple":
+        return rows
+    if not rows:
+        return {} if row_format == "columnar" else []
+    columns = columns_of(cursor)
+    if row_format == "record":
+        return list(map(record_type(columns)._make, rows))
+    if row_format == "dict":
+        return [dict(zip(columns, row)) for row in rows]
+    return {col: list(values) for col, values in zip(columns, zip(*rows))}
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+profiling.py
+
+Opt-in per-stage timing for the generator pipelines.
+
+    with Profiler() as prof:
+        batch_processing(50)
+    print(prof.summary())
+
+While a Profiler is active the generators record, per stage:
+- calls, rows and approximate bytes produced
+- wall and CPU (thread) time
+- blocked: time suspended at `yield` waiting for the consumer
+
+Stage names are "<generator>.fetch" (driver), "<generator>.build" (row
+formatting), "<generator>" (blocked on the consumer) and consumer stages such
+as "batch_processing.filter" / "batch_processing.output".
+Profiler(cprofile=True) also runs cProfile; dump_stats(path) writes a pstats
+file for snakeviz/pstats.
+
+When no Profiler is active, active() returns None and the generators skip all
+of this: one lookup per generator plus an `if` per batch or row.
+The active Profiler is a context variable: nested profilers restore the outer
+one on exit, and other threads (or asyncio tasks started before it) are not
+recorded.
+"""
+
+import cProfile
+import contextlib
+import contextvars
+import sys
+import time
+
+_active = contextvars.ContextVar("profiling_active", default=None)
+
+
+def active():
+    """The running Profiler in this context, or None"""
+    return _active.get()
+
+
+def _is_columnar(result):
+    """{column: [values]} batch, as opposed to a single dict row"""
+    return isinstance(result, dict) and isinstance(
+        next(iter(result.values()), None), list
+    )
+
+
+def _count_rows(result):
+    if result is None or (isinstance(result, (list, dict)) and not result):
+        return 0
+    if _is_columnar(result):
+        return len(next(iter(result.values())))
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+
+def _nbytes(result):
+    """Approximate payload size of a row, a batch or a columnar batch"""
+    if result is None:
+        return 0
+    if _is_columnar(result):
+        return sum(sys.getsizeof(v) for col in result.values() for v in col)
+    if isinstance(result, list):
+        return sum(_nbytes(row) for row in result)
+    if isinstance(result, dict):
+        return sum(sys.getsizeof(v) for v in result.values())
+    if isinstance(result, tuple):
+        return sum(sys.getsizeof(v) for v in result)
+    return sys.getsizeof(result)
+
+
+class StageStats:
+    """Counters for one stage"""
+
+    __slots__ = ("calls", "rows", "bytes", "wall", "cpu", "blocked")
+
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.bytes = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.blocked = 0.0
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Profiler:
+    """Collects StageStats while active (use as a context manager)"""
+
+    def __init__(self, cprofile=False):
+        self.stages = {}
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(_active.set(self))
+        if self._cprofile:
+            self._cprofile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._cprofile:
+            self._cprofile.disable()
+        _active.reset(self._tokens.pop())
+        return False
+
+    def stage(self, name):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        return stats
+
+    def timed(self, name, func, *args):
+        """Call func(*args), charging its time and output to `name`"""
+        stats = self.stage(name)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        result = func(*args)
+        stats.wall += time.perf_counter() - wall
+        stats.cpu += time.thread_time() - cpu
+        stats.calls += 1
+        stats.rows += _count_rows(result)
+        stats.bytes += _nbytes(result)
+        return result
+
+    @contextlib.contextmanager
+    def span(self, name, rows=0):
+        """Charge the time of a `with` block to `name`"""
+        stats = self.stage(name)
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield stats
+        finally:
+            stats.wall += time.perf_counter() - wall
+            stats.cpu += time.thread_time() - cpu
+            stats.calls += 1
+            stats.rows += rows
+
+    def iterate(self, name, iterable):
+        """Yield from iterable, timing each next() as stage `name`"""
+        it = iter(iterable)
+        while True:
+            try:
+                item = self.timed(name, next, it)
+            except StopIteration:
+                return
+            yield item
+
+    def blocked(self, name, seconds):
+        """Record time a generator spent suspended at yield"""
+        self.stage(name).blocked += seconds
+
+    def as_dict(self):
+        return {name: stats.as_dict() for name, stats in self.stages.items()}
+
+    def summary(self):
+        lines = [f"{'stage':36} {'calls':>8} {'rows':>10} {'bytes':>12}"
+                 f" {'wall ms':>10} {'cpu ms':>10} {'blocked ms':>11}"]
+        for name, s in sorted(self.stages.items()):
+            lines.append(
+                f"{name:36} {s.calls:>8} {s.rows:>10} {s.bytes:>12}"
+                f" {s.wall * 1000:>10.2f} {s.cpu * 1000:>10.2f}"
+                f" {s.blocked * 1000:>11.2f}"
+            )
+        return "\n".join(lines)
+
+    def dump_stats(self, path):
+        """Write cProfile data (pstats format); needs Profiler(cprofile=True)"""
+        if not self._cprofile:
+            raise ValueError("Profiler was created without cprofile=True")
+        self._cprofile.dump_stats(path)